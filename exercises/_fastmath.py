@@ -0,0 +1,104 @@
+"""
+Fast Math Kernels
+
+This module contains the per-frame rep counting math for the exercise
+trackers, compiled with numba when it is installed.
+"""
+
+import math
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Landmarks packed into the flat array passed to squat_update, as (x, y) pairs
+SQUAT_LANDMARKS = (11, 23, 24, 25, 26, 27, 28)
+
+@njit(cache=True, fastmath=True)
+def joint_angle(ax, ay, bx, by, cx, cy):
+    """Angle in degrees at b between the points a and c."""
+    angle = abs(math.atan2(cy-by, cx-bx) - math.atan2(ay-by, ax-bx)) * 57.29577951308232
+    return 360.0 - angle if angle > 180.0 else angle
+
+# Compile (or load from cache) at import rather than on the first frame
+joint_angle(0.0, 1.0, 0.0, 0.0, 1.0, 0.0)
+
+@njit(cache=True, fastmath=True)
+def squat_update(lm, direction, per_slope, knee_threshold, per_hist):
+    """
+    Run the squat counting math for one frame.
+
+    Args:
+        lm: float32 array of the SQUAT_LANDMARKS as flat (x, y) pairs
+        direction (int): Current movement direction (0 = down, 1 = up)
+        per_slope (float): Percentage per degree, 100 / (180 - full-depth leg angle)
+        knee_threshold (float): Minimum knee angle for good alignment
+        per_hist: float64 array of the last percentages (odd length), updated in place
+
+    Returns:
+        tuple: (percentage, bar, count_delta, direction, back_ok, knee_ok)
+    """
+    # Offsets into lm: shoulder 0, hips 2/4, knees 6/8, ankles 10/12
+    hip_x, hip_y = lm[2], lm[3]
+    knee_x, knee_y = lm[6], lm[7]
+    left_leg_angle = joint_angle(hip_x, hip_y, knee_x, knee_y, lm[10], lm[11])
+    right_leg_angle = joint_angle(lm[4], lm[5], lm[8], lm[9], lm[12], lm[13])
+    back_angle = joint_angle(lm[0], lm[1], hip_x, hip_y, knee_x, knee_y)
+
+    # Knee alignment is measured on the same hip-knee-ankle triplet
+    knee_angle = left_leg_angle
+
+    avg_leg_angle = (left_leg_angle + right_leg_angle) / 2
+    per = max(0.0, min(100.0, (180.0 - avg_leg_angle) * per_slope))
+
+    # Count on the median of the last frames, so a jittery frame
+    # near the thresholds can't flip the direction
+    per_hist[:-1] = per_hist[1:]
+    per_hist[-1] = per
+    per = np.sort(per_hist)[per_hist.size // 2]
+    bar = 650.0 - per * 5.5  # 650 at 0%, 100 at 100%
+
+    count_delta = 0.0
+    if per == 100.0:
+        if direction == 0:
+            count_delta = 0.5
+            direction = 1
+    elif per == 0.0:
+        if direction == 1:
+            count_delta = 0.5
+            direction = 0
+
+    return per, bar, count_delta, direction, back_angle >= 160.0, knee_angle >= knee_threshold
+
+@njit(cache=True, fastmath=True)
+def pushup_update(angle, direction):
+    """
+    Run the push-up counting math for one frame.
+
+    Args:
+        angle (float): Elbow angle in degrees
+        direction (int): Current movement direction
+
+    Returns:
+        tuple: (percentage, bar, count_delta, direction)
+    """
+    per = -1.25 * angle + 212.5
+    per = 0.0 if per < 0.0 else 100.0 if per > 100.0 else per
+    bar = 650.0 - per * 5.5  # 650 at 0%, 100 at 100%
+
+    count_delta = 0.0
+    if per >= 95.0:
+        if direction == 0:
+            count_delta = 0.5
+            direction = 1
+    elif per <= 5.0:
+        if direction == 1:
+            count_delta = 0.5
+            direction = 0
+
+    return per, bar, count_delta, direction
@@ -7,7 +7,7 @@ for all exercise trackers.
 
 import time
 import cv2
-import numpy as np
+from ._fastmath import joint_angle
 
 class BaseExercise:
     """Base class for all exercise trackers."""
@@ -50,17 +50,8 @@ class BaseExercise:
         Returns:
             float: Angle in degrees
         """
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-        
-        radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-        
-        if angle > 180.0:
-            angle = 360 - angle
-            
-        return angle
+        return joint_angle(float(a[0]), float(a[1]), float(b[0]), float(b[1]),
+                           float(c[0]), float(c[1]))
     
     def draw_progress_bar(self, img, per, bar, color):
         """
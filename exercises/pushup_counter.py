@@ -3,44 +3,73 @@ import mediapipe as mp
 import time
 import math
 import numpy as np
+from exercises._fastmath import pushup_update
 
 class poseDetector():
     
-    def __init__(self, mode=False, smooth=True, detectionCon = 0.5, trackingCon=0.5):
+    def __init__(self, mode=False, smooth=True, detectionCon = 0.5, trackingCon=0.5, inferenceSize=640):
         self.mode = mode
         self.smooth = smooth
         self.detectionCon = detectionCon
         self.trackingCon = trackingCon
+        self.inferenceSize = inferenceSize
         self.mpPose = mp.solutions.pose
         self.pose = self.mpPose.Pose(
             static_image_mode = self.mode,
+            model_complexity = 0,
             smooth_landmarks = self.smooth,
             min_detection_confidence = self.detectionCon,
             min_tracking_confidence = self.trackingCon
         )
         self.mpDraw = mp.solutions.drawing_utils
+        self._small = None
+        self._dsizeShape = None
+        self._scale_shape = None
+        self._frameIdx, self._emptyStreak, self._skip = 0, 0, 1
 
     def findPose(self, img, draw=True):
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.pose.process(imgRGB)
+        # While nobody is in view, only run inference every _skip-th frame
+        self._frameIdx += 1
+        if self._frameIdx % self._skip == 0:
+            # Landmarks are normalized, so run inference on a downscaled copy
+            # and swap its channels in place; read-only frames go to MediaPipe by reference
+            if self._dsizeShape != img.shape:
+                # Scale the long side to inferenceSize, keeping the aspect ratio
+                h, w = img.shape[:2]
+                scale = min(1.0, self.inferenceSize / max(h, w))
+                self._dsizeShape, self._dsize = img.shape, (round(w * scale), round(h * scale))
+            self._small = cv2.resize(img, self._dsize, dst=self._small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2RGB, dst=self._small)
+            self._small.flags.writeable = False
+            self.results = self.pose.process(self._small)
+            self._small.flags.writeable = True
+            if self.results.pose_landmarks:
+                self._emptyStreak, self._skip = 0, 1
+            else:
+                self._emptyStreak += 1
+                self._skip = min(8, 1 << (self._emptyStreak // 5))
         if draw and self.results.pose_landmarks:
             self.mpDraw.draw_landmarks(img, self.results.pose_landmarks, self.mpPose.POSE_CONNECTIONS)
         return img
     
     def findPosition(self, img, draw=True):
-        self.lmList = []
-        if  self.results.pose_landmarks:
-            for id, lm in enumerate(self.results.pose_landmarks.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x*w), int(lm.y*h)
-                self.lmList.append([id, cx, cy])
-                if draw: cv2.circle(img, (cx, cy), 5, (0, 255, 0), cv2.FILLED)
+        if not self.results.pose_landmarks:
+            self.lmList = np.empty((0, 2), np.int32)
+            return self.lmList
+        if self._scale_shape != img.shape:
+            h, w, c = self._scale_shape = img.shape
+            self._scale = np.array([w, h], np.float32)
+        lms = np.fromiter((v for lm in self.results.pose_landmarks.landmark for v in (lm.x, lm.y)),
+                          dtype=np.float32, count=66).reshape(33, 2)
+        self.lmList = (lms * self._scale).astype(np.int32)
+        # Zero-length segments with thickness 10 draw all 33 dots in one call
+        if draw: cv2.polylines(img, list(np.repeat(self.lmList[:, None], 2, axis=1)), False, (0, 255, 0), 10)
         return self.lmList
     
     def findAngle(self, img, p1, p2, p3, draw=True):
-        x1, y1 = self.lmList[p1][1], self.lmList[p1][2]
-        x2, y2 = self.lmList[p2][1], self.lmList[p2][2]
-        x3, y3 = self.lmList[p3][1], self.lmList[p3][2]
+        x1, y1 = self.lmList[p1].tolist()
+        x2, y2 = self.lmList[p2].tolist()
+        x3, y3 = self.lmList[p3].tolist()
         angle = math.degrees(math.atan2(y3 - y2, x3 - x2) - math.atan2(y1 - y2, x1 - x2))
         if angle > 180: angle = 360 - angle
         elif angle < 0: angle = -angle
@@ -58,6 +87,8 @@ class poseDetector():
 
 
 cap = cv2.VideoCapture(0)
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
 pTime = 0
 detector = poseDetector(detectionCon=0.8)
 count, dir, bar, per = 0, 0, 0, 0
@@ -69,24 +100,14 @@ while True:
     lmList = detector.findPosition(img, draw=False)
 
     if (len(lmList)):
-        if (lmList[31][2] + 50 > lmList[29][2] and lmList[32][2] + 50 > lmList[30][2]):
+        if (lmList[31][1] + 50 > lmList[29][1] and lmList[32][1] + 50 > lmList[30][1]):
             angle = detector.findAngle(img, 11, 13, 15)
             detector.findAngle(img, 12, 14, 16)
             detector.findAngle(img, 27, 29, 31)
             detector.findAngle(img, 28, 30, 32)
             
-            per = -1.25 * angle + 212.5
-            per = (0 if per < 0 else 100 if per > 100 else per)
-            bar = np.interp(per, (0, 100), (650, 100))
-            
-            if per >= 95:
-                if dir == 0:
-                    count += 0.5
-                    dir = 1
-            elif per <= 5:
-                if dir == 1:
-                    count += 0.5
-                    dir = 0
+            per, bar, count_delta, dir = pushup_update(angle, dir)
+            count += count_delta
 
             img = cv2.flip(img, 1)
             
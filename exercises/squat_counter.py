@@ -5,44 +5,104 @@ This module contains the SquatCounter class which extends PoseEstimator
 to provide squat counting and form analysis functionality.
 """
 
+import array
 import cv2
+import io
+import math
 import numpy as np
+import queue
+import struct
+import threading
 import time
+import wave
 from datetime import datetime
 from models.pose_estimator import PoseEstimator
 from .base_exercise import BaseExercise
+from ._fastmath import SQUAT_LANDMARKS, squat_update
+
+try:
+    import winsound
+except ImportError:  # winsound is only available on Windows
+    winsound = None
+
+def _tone_wav(frequency, duration, rate=22050):
+    """Synthesize a sine tone as the bytes of a 16-bit mono WAV file."""
+    n = rate * duration // 1000
+    step = 2 * math.pi * frequency / rate
+    samples = struct.pack('<%dh' % n, *(int(12000 * math.sin(step * i)) for i in range(n)))
+    
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples)
+    return buf.getvalue()
 
 class SquatAnalytics:
     """Class to track and analyze workout statistics."""
     
     def __init__(self):
         self.session_start = None
-        self.rep_times = []
-        self.depths = []
-        self.form_errors = []
+        self.rep_times = array.array('d')
+        self.depths = array.array('d')
+        self.form_errors = array.array('B')
+        
+        # Running totals so get_stats doesn't rescan every rep
+        self._depth_sum = 0.0
+        self._form_error_count = 0
+        
+        # Rep statistics from get_stats, rebuilt only after a new rep
+        self._rep_stats = None
+        
         self.feedback_messages = []
+        self._feedback_seen = set()
         self.last_beep_time = 0
         self.beep_cooldown = 1.0  # seconds between beeps
         
+        # Tones are synthesized once and played on a background thread, since
+        # winsound blocks while playing and cannot play from memory asynchronously
+        self._tones = {(1000, 200): _tone_wav(1000, 200)}
+        self._beep_q = queue.Queue(maxsize=1)
+        if winsound is not None:
+            threading.Thread(target=self._beep_loop, daemon=True).start()
+        
+    def _beep_loop(self):
+        """Play queued tones until the process exits."""
+        while True:
+            wav = self._beep_q.get()
+            try:
+                winsound.PlaySound(wav, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+            except Exception as e:
+                print(f"Could not play beep sound: {e}")
+        
     def play_beep(self, frequency=1000, duration=200):
-        """Play a beep sound if not in cooldown."""
+        """Play a beep sound without blocking if not in cooldown."""
+        if winsound is None:
+            return
+        
         current_time = time.time()
         if current_time - self.last_beep_time > self.beep_cooldown:
+            wav = self._tones.get((frequency, duration))
+            if wav is None:
+                wav = self._tones[(frequency, duration)] = _tone_wav(frequency, duration)
             try:
-                winsound.Beep(frequency, duration)
+                self._beep_q.put_nowait(wav)
                 self.last_beep_time = current_time
-            except Exception as e:
-                print(f"Could not play beep sound: {e}")
+            except queue.Full:
+                pass  # Still playing the previous beep
     
     def add_feedback(self, message):
         """Add a feedback message and play a beep."""
-        if message and message not in self.feedback_messages:
+        if message and message not in self._feedback_seen:
+            self._feedback_seen.add(message)
             self.feedback_messages.append(message)
             self.play_beep()
             
     def clear_feedback(self):
         """Clear all feedback messages."""
         self.feedback_messages.clear()
+        self._feedback_seen.clear()
         
     def start_session(self):
         """Start a new workout session."""
@@ -59,30 +119,38 @@ class SquatAnalytics:
         self.rep_times.append(time.time())
         self.depths.append(depth)
         self.form_errors.append(not form_ok)
+        self._depth_sum += depth
+        self._form_error_count += not form_ok
+        self._rep_stats = None
         
     def get_stats(self):
         """Calculate and return workout statistics."""
         if not self.rep_times:
             return {}
+        
+        if self._rep_stats is None:
+            total_reps = len(self.rep_times)
+            avg_depth = self._depth_sum / total_reps
+            good_form_percentage = (1 - self._form_error_count / total_reps) * 100
+            
+            # Calculate reps per minute
+            if len(self.rep_times) > 1:
+                time_elapsed = self.rep_times[-1] - self.rep_times[0]
+                reps_per_min = (len(self.rep_times) - 1) / (time_elapsed / 60)
+            else:
+                reps_per_min = 0
             
-        total_reps = len(self.rep_times)
-        avg_depth = np.mean(self.depths) if self.depths else 0
-        good_form_percentage = (1 - sum(self.form_errors) / total_reps) * 100 if total_reps > 0 else 100
-        
-        # Calculate reps per minute
-        if len(self.rep_times) > 1:
-            time_elapsed = self.rep_times[-1] - self.rep_times[0]
-            reps_per_min = (len(self.rep_times) - 1) / (time_elapsed / 60)
-        else:
-            reps_per_min = 0
-            
-        return {
-            'total_reps': total_reps,
-            'avg_depth': avg_depth,
-            'good_form_percentage': good_form_percentage,
-            'reps_per_min': reps_per_min,
-            'session_duration': (datetime.now() - self.session_start).total_seconds() / 60 if self.session_start else 0
-        }
+            self._rep_stats = {
+                'total_reps': total_reps,
+                'avg_depth': avg_depth,
+                'good_form_percentage': good_form_percentage,
+                'reps_per_min': reps_per_min
+            }
+        
+        # Only the session duration changes between reps
+        stats = dict(self._rep_stats)
+        stats['session_duration'] = (datetime.now() - self.session_start).total_seconds() / 60 if self.session_start else 0
+        return stats
 
 class SquatCounter(BaseExercise, PoseEstimator):
     """
@@ -95,21 +163,40 @@ class SquatCounter(BaseExercise, PoseEstimator):
         PoseEstimator.__init__(self)
         
         # Squat-specific parameters
-        self.direction = 0
-        self.prev_per = 0
-        self.count = 0
-        self.form_ok = True
         self.feedback = "Start with standing position"
         
         # Thresholds
         self.SQUAT_ANGLE = 140
         self.BACK_ANGLE_THRESHOLD = 15
         self.KNEE_ANGLE_THRESHOLD = 160
+        self.MIN_VISIBILITY = 0.3
+        self.SMOOTHING_FRAMES = 5
+        self._per_slope = 100.0 / (180.0 - self.SQUAT_ANGLE)
         
         # Analytics
         self.analytics = SquatAnalytics()
         self.analytics.start_session()
         
+        # Landmark and percentage history buffers for squat_update, warmed up
+        # once (on a scratch history) to pay the JIT cost here
+        self._lm = np.zeros(2 * len(SQUAT_LANDMARKS), dtype=np.float32)
+        self._lm_pairs = self._lm.reshape(-1, 2)
+        self._per_hist = np.zeros(self.SMOOTHING_FRAMES)
+        squat_update(self._lm, 0, self._per_slope, self.KNEE_ANGLE_THRESHOLD,
+                     self._per_hist.copy())
+        
+        # Indices into lm_vis of the tracked landmarks, and their names for feedback
+        self._lm_idx = np.array(SQUAT_LANDMARKS, dtype=np.intp)
+        self._lm_names = ('left shoulder', 'left hip', 'right hip', 'left knee',
+                          'right knee', 'left ankle', 'right ankle')
+        
+        # Deepest point and whether the form held so far in the rep in progress
+        self._rep_depth = 0.0
+        self._rep_form_ok = True
+        
+        # Last analysis, returned again until new pose results arrive
+        self._last_output = None
+        
     def process_frame(self, frame):
         """
         Process a single frame for squat counting.
@@ -121,82 +208,67 @@ class SquatCounter(BaseExercise, PoseEstimator):
             tuple: (processed_frame, percentage, bar, color, form_ok, feedback)
         """
         try:
-            # Get pose landmarks
+            # Get pose landmarks; find_pose already draws them, so don't
+            # draw the landmark dots a second time
             frame = self.find_pose(frame)
-            lm_list = self.find_position(frame)
+            
+            # Without new results the landmarks haven't moved, so skip the
+            # analysis rather than counting the same pose twice
+            if not self._new_results and self._last_output is not None:
+                return (frame,) + self._last_output
+            
+            lm_list = self.find_position(frame, draw=False)
             
             if len(lm_list) == 0:
-                return frame, 0, 0, (0, 0, 255), False, "No person detected"
+                self._last_output = (0, 0, (0, 0, 255), False, "No person detected")
+                return (frame,) + self._last_output
+            
+            # Angles from landmarks MediaPipe can't see are guesses, so skip the frame
+            hidden = self.lm_vis[self._lm_idx] < self.MIN_VISIBILITY
+            if hidden.any():
+                missing = ', '.join(self._lm_names[i] for i in np.flatnonzero(hidden))
+                self._last_output = (0, 0, (0, 0, 255), False, f"Move into view: {missing}")
+                return (frame,) + self._last_output
                 
-            # Calculate angles for squat detection
-            left_leg_angle = self.calculate_angle(
-                lm_list[23][1:3],  # Left hip
-                lm_list[25][1:3],  # Left knee
-                lm_list[27][1:3]   # Left ankle
-            )
-            
-            right_leg_angle = self.calculate_angle(
-                lm_list[24][1:3],  # Right hip
-                lm_list[26][1:3],  # Right knee
-                lm_list[28][1:3]   # Right ankle
-            )
-            
-            # Calculate back angle
-            back_angle = self.calculate_angle(
-                lm_list[11][1:3],  # Left shoulder
-                lm_list[23][1:3],  # Left hip
-                lm_list[25][1:3]   # Left knee
-            )
-            
-            # Calculate percentage of squat completion
-            avg_leg_angle = (left_leg_angle + right_leg_angle) / 2
-            per = np.interp(avg_leg_angle, 
-                          (self.SQUAT_ANGLE, 180), 
-                          (100, 0))
+            # Gather the tracked landmarks and run the compiled squat math
+            np.take(self.lm_xy, SQUAT_LANDMARKS, axis=0, out=self._lm_pairs)
+            
+            per, bar, count_delta, self.direction, back_ok, knee_ok = squat_update(
+                self._lm, self.direction, self._per_slope, self.KNEE_ANGLE_THRESHOLD,
+                self._per_hist)
+            self.count += count_delta
             
             # Check form
             self.form_ok = True
             self.feedback = "Good form!"
             
             # Check back angle
-            if back_angle < 160:
+            if not back_ok:
                 self.form_ok = False
                 self.feedback = "Keep your back straight"
             
             # Check knee alignment
-            knee_angle = self.calculate_angle(
-                lm_list[23][1:3],  # Left hip
-                lm_list[25][1:3],  # Left knee
-                lm_list[27][1:3]   # Left ankle
-            )
-            
-            if knee_angle < self.KNEE_ANGLE_THRESHOLD:
+            if not knee_ok:
                 self.form_ok = False
                 self.feedback = "Keep your knees behind your toes"
             
-            # Check for squat completion
-            if per == 100:
-                if self.direction == 0:
-                    self.count += 0.5
-                    self.direction = 1
-            elif per == 0:
-                if self.direction == 1:
-                    self.count += 0.5
-                    self.direction = 0
-            
-            # Calculate progress bar
-            bar = np.interp(per, (0, 100), (650, 100))
-            
             # Set color based on form
             color = (0, 255, 0) if self.form_ok else (0, 0, 255)
             
             # Add feedback to analytics
             self.analytics.add_feedback(self.feedback)
             
-            # Log the rep with form check
-            self.analytics.add_rep(per, self.form_ok)
+            # Log the rep once it is back at the top, with its deepest point
+            # and whether the form held on every frame of it
+            self._rep_depth = max(self._rep_depth, per)
+            self._rep_form_ok = self._rep_form_ok and self.form_ok
+            if count_delta and self.direction == 0:
+                self.analytics.add_rep(self._rep_depth, self._rep_form_ok)
+                self._rep_depth = 0.0
+                self._rep_form_ok = True
             
-            return frame, per, bar, color, self.form_ok, self.feedback
+            self._last_output = (per, bar, color, self.form_ok, self.feedback)
+            return (frame,) + self._last_output
             
         except Exception as e:
             print(f"Error in process_frame: {e}")
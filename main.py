@@ -8,89 +8,167 @@ It supports multiple exercises including push-ups and squats.
 
 import argparse
 import cv2
-import time
+import queue
+import threading
 import sys
+from collections import namedtuple
 from exercises.pushup_counter import PushupCounter
 from exercises.squat_counter import SquatCounter
 from models.pose_estimator import PoseEstimator
 from utils.ui_utils import draw_ui
 
-def draw_ui(img, detector, per, bar, color, form_ok, form_feedback, p_time):
+# What draw_ui reads from the detector, captured with each frame on the compute stage
+DetectorState = namedtuple('DetectorState', ['name', 'count'])
+
+def read_frames(cap, read_q, needs_frame, stop_event):
+    """
+    Reader stage: capture and mirror frames for the compute stage.
+    
+    Frames are grabbed continuously to keep the stream current, but only
+    decoded with retrieve() when the compute stage has asked for one, so
+    frames dropped while pose inference is busy cost no decode time.
+    
+    Args:
+        cap: The opened cv2.VideoCapture
+        read_q: Queue the mirrored frames are put on
+        needs_frame: Event set by the compute stage when it is ready for a frame
+        stop_event: Event signalling that the session should end
+    """
+    try:
+        while not stop_event.is_set():
+            if not cap.grab():
+                print("Failed to capture image from webcam.")
+                break
+            
+            if not needs_frame.is_set():
+                continue
+            
+            success, img = cap.retrieve()
+            if not success:
+                print("Failed to capture image from webcam.")
+                break
+            needs_frame.clear()
+            
+            # Mirror the image in place; retrieve() already returned a fresh buffer
+            read_q.put(cv2.flip(img, 1, dst=img))
+    finally:
+        # End the session however this stage exits; the compute stage also
+        # watches stop_event, so the sentinel may be dropped if the queue is full
+        stop_event.set()
+        try:
+            read_q.put_nowait(None)
+        except queue.Full:
+            pass
+
+def compute_frames(detector, read_q, draw_q, needs_frame, stop_event):
     """
-    Draw the user interface elements on the frame.
+    Compute stage: run the exercise detector on captured frames.
+    
+    The detector is only used from this thread; the display stage gets a
+    snapshot of the rep count with each processed frame.
     
     Args:
-        img: The image frame to draw on
         detector: The exercise counter instance
-        per: Exercise completion percentage
-        bar: Progress bar height
-        color: Color for the progress bar
-        form_ok: Boolean indicating if form is correct
-        form_feedback: Text feedback about form
-        p_time: Previous time for FPS calculation
+        read_q: Queue of mirrored frames from the reader stage
+        draw_q: Queue the processed frames are put on for the display stage
+        needs_frame: Event set here when ready for the next frame
+        stop_event: Event signalling that the session should end
     """
-    h, w, _ = img.shape
-    
-    # Draw semi-transparent overlay for better text visibility
-    overlay = img.copy()
-    cv2.rectangle(overlay, (0, 0), (w, h), (0, 0, 0), -1)
-    alpha = 0.4  # Transparency factor
-    cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0, img)
-    
-    # Draw progress bar with border
-    cv2.rectangle(img, (w-100, 100), (w-25, h-100), (200, 200, 200), 3)
-    cv2.rectangle(img, (w-100, int(bar)), (w-25, h-100), color, cv2.FILLED)
-    cv2.rectangle(img, (w-100, 100), (w-25, h-100), (255, 255, 255), 1)
-    
-    # Draw percentage text
-    cv2.putText(img, f'{int(per)}%', (w-150, 80),
-               cv2.FONT_HERSHEY_PLAIN, 2, (255, 255, 255), 2)
-    
-    # Draw rep counter with background
-    cv2.rectangle(img, (20, 20), (300, 120), (0, 0, 0), -1)
-    cv2.rectangle(img, (20, 20), (300, 120), (0, 255, 0), 2)
-    cv2.putText(img, f'REPS: {int(detector.count)}', (40, 80), 
-               cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-    
-    # Draw form feedback with background
-    if form_feedback:
-        text_size = cv2.getTextSize(form_feedback, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
-        text_x = (w - text_size[0]) // 2
-        cv2.rectangle(img, 
-                     (text_x - 10, 20), 
-                     (text_x + text_size[0] + 10, 60), 
-                     (0, 0, 0), -1)
-        cv2.rectangle(img, 
-                     (text_x - 10, 20), 
-                     (text_x + text_size[0] + 10, 60), 
-                     (0, 255, 0) if form_ok else (0, 0, 255), 2)
-        cv2.putText(img, form_feedback, (text_x, 50),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, 
-                   (255, 255, 255), 2)
-    
-    # Draw FPS
-    c_time = time.time()
-    fps = 1 / (c_time - p_time)
-    p_time = c_time
-    cv2.putText(img, f'FPS: {int(fps)}', (w-150, 30),
-               cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
-    
-    # Draw instructions
-    instructions = [
-        "INSTRUCTIONS:",
-        "1. Stand 6-8 feet from camera",
-        "2. Keep feet shoulder-width apart",
-        "3. Keep back straight",
-        "4. Perform exercise until completion",
-        "5. Press 'q' to quit"
-    ]
-    
-    for i, line in enumerate(instructions):
-        y_pos = h - 150 + (i * 25)
-        cv2.putText(img, line, (20, y_pos),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-    
-    return img, p_time
+    try:
+        while not stop_event.is_set():
+            needs_frame.set()
+            try:
+                img = read_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if img is None:
+                break
+            
+            # Process the frame; the UI is drawn straight onto the processed frame
+            try:
+                img, per, bar, color, form_ok, feedback = detector.process_frame(img)
+            except Exception as e:
+                print(f"Error processing frame: {e}")
+                continue
+            
+            item = (img, detector.count, per, bar, color, form_ok, feedback)
+            while not stop_event.is_set():
+                try:
+                    draw_q.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+    finally:
+        # As in the reader, the display stage also notices this thread exiting
+        stop_event.set()
+        try:
+            draw_q.put_nowait(None)
+        except queue.Full:
+            pass
+
+def display_frames(draw_q, name, stop_event, producer):
+    """
+    Display stage: draw the UI on processed frames and show them.
+    
+    Runs on the main thread, which HighGUI requires on some platforms, and
+    returns once it receives the None sentinel or the compute stage exits.
+    
+    Args:
+        draw_q: Queue of (frame, count, per, bar, color, form_ok, feedback) tuples
+        name: Name of the exercise being tracked
+        stop_event: Event set here when the user presses 'q'
+        producer: The compute stage thread
+    """
+    p_time = 0
+    
+    try:
+        while True:
+            try:
+                item = draw_q.get(timeout=0.1)
+            except queue.Empty:
+                if not producer.is_alive():
+                    break
+                continue
+            if item is None:
+                break
+            if stop_event.is_set():
+                continue
+            
+            display_img, count, per, bar, color, form_ok, feedback = item
+            
+            # Draw UI elements
+            try:
+                display_img, p_time = draw_ui(
+                    display_img, DetectorState(name, count), per, bar, color, 
+                    form_ok, feedback, p_time
+                )
+            except Exception as e:
+                print(f"Error drawing frame: {e}")
+                continue
+            
+            # Display the image
+            cv2.imshow("Fitness Tracker", display_img)
+            
+            # Check for quit key
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                stop_event.set()
+    finally:
+        stop_event.set()
+
+def run_stage(stage, failed, *args):
+    """
+    Run a pipeline stage, recording whether it crashed.
+    
+    Args:
+        stage: Stage function to run
+        failed: Event set if the stage raises
+        *args: Arguments for the stage
+    """
+    try:
+        stage(*args)
+    except Exception:
+        failed.set()
+        raise
 
 def main():
     """Main function to run the Fitness Tracker application."""
@@ -119,55 +197,47 @@ def main():
     cap.set(cv2.CAP_PROP_FPS, 30)
     cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
     
+    # Keep only the freshest frame queued and prefer cheap MJPEG decoding
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    
     # Initialize the selected exercise
     if args.exercise == 'pushup':
         detector = PushupCounter()
     else:  # default to squat
         detector = SquatCounter()
     
-    # FPS variables
-    p_time = 0
-    c_time = 0
-    
-    # Main loop
-    while True:
-        success, img = cap.read()
-        if not success:
-            print("Failed to capture image from webcam.")
-            break
-        
-        # Mirror the image
-        img = cv2.flip(img, 1)
-        display_img = img.copy()
-        
-        # Process the frame
-        try:
-            # Process the exercise
-            img, per, bar, color, form_ok, feedback = detector.process_frame(img)
-            
-            # Draw UI elements
-            display_img, p_time = draw_ui(
-                display_img, detector, per, bar, color, 
-                form_ok, feedback, p_time
-            )
-            
-        except Exception as e:
-            print(f"Error processing frame: {e}")
-            continue
+    # Pipeline queues between the reader, compute and display stages
+    read_q = queue.Queue(maxsize=2)
+    draw_q = queue.Queue(maxsize=2)
+    needs_frame = threading.Event()
+    stop_event = threading.Event()
+    failed = threading.Event()  # set if the reader or compute stage crashes
+    
+    reader = threading.Thread(target=run_stage,
+                              args=(read_frames, failed, cap, read_q, needs_frame, stop_event))
+    compute = threading.Thread(target=run_stage,
+                               args=(compute_frames, failed, detector, read_q, draw_q,
+                                     needs_frame, stop_event))
+    reader.start()
+    compute.start()
+    
+    # Main loop (display stage), kept on the main thread for HighGUI
+    try:
+        display_frames(draw_q, detector.name, stop_event, compute)
+    finally:
+        # Stop the other stages even if this one failed
+        stop_event.set()
+        reader.join()
+        compute.join()
         
-        # Display the image
-        cv2.imshow("Fitness Tracker", display_img)
-        
-        # Check for quit key
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-    
-    # Clean up
-    cap.release()
-    cv2.destroyAllWindows()
-    print("\nSession ended.")
+        # Clean up
+        PoseEstimator.close_workers()
+        cap.release()
+        cv2.destroyAllWindows()
+        print("\nSession ended.")
     
-    return 0
+    return 1 if failed.is_set() else 0
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -8,13 +8,26 @@ using MediaPipe Pose. It handles pose detection, landmark tracking, and angle ca
 import cv2
 import mediapipe as mp
 import numpy as np
+import threading
+from types import SimpleNamespace
+from exercises._fastmath import joint_angle
+from models.pose_worker import PoseWorker
+
+# Stand-in results until the first frame comes back from the worker
+_NO_RESULTS = SimpleNamespace(pose_landmarks=None)
 
 class PoseEstimator:
     """A class for detecting and tracking human poses using MediaPipe."""
     
-    def __init__(self, mode=False, model_complexity=1, smooth_landmarks=True,
+    # MediaPipe Pose solutions and the lock serializing their use, keyed by
+    # configuration, and the pose workers of all estimators
+    _shared_poses = {}
+    _workers = []
+    
+    def __init__(self, mode=False, model_complexity=0, smooth_landmarks=True,
                  enable_segmentation=False, smooth_segmentation=True,
-                 min_detection_confidence=0.5, min_tracking_confidence=0.5):
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 inference_size=640, lookahead=1):
         """Initialize the pose estimator with MediaPipe Pose.
         
         Args:
@@ -25,6 +38,13 @@ class PoseEstimator:
             smooth_segmentation (bool): Whether to filter segmentation across different frames.
             min_detection_confidence (float): Minimum confidence for pose detection.
             min_tracking_confidence (float): Minimum confidence for pose tracking.
+            inference_size (int): Length the long side of frames is downscaled to
+                before inference, keeping their aspect ratio, or None to run on the
+                full frame.
+            lookahead (int): Maximum number of frames kept in flight on the pose
+                worker. With 1 or more, find_pose never waits: it uses the newest
+                landmarks the worker has finished and only submits the frame if the
+                worker has room; 0 waits for the current frame.
         """
         self.mode = mode
         self.model_complexity = model_complexity
@@ -33,19 +53,58 @@ class PoseEstimator:
         self.smooth_segmentation = smooth_segmentation
         self.min_detection_confidence = min_detection_confidence
         self.min_tracking_confidence = min_tracking_confidence
+        self.inference_size = inference_size
+        self.lookahead = lookahead
         
-        # Initialize MediaPipe Pose
+        # Initialize MediaPipe Pose, built once per configuration and shared by
+        # all estimators since graph setup is expensive. Each estimator gets its
+        # own worker thread and queues, so results never go to the wrong caller
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=self.mode,
-            model_complexity=self.model_complexity,
-            smooth_landmarks=self.smooth_landmarks,
-            enable_segmentation=self.enable_segmentation,
-            smooth_segmentation=self.smooth_segmentation,
-            min_detection_confidence=self.min_detection_confidence,
-            min_tracking_confidence=self.min_tracking_confidence
-        )
+        config = (mode, model_complexity, smooth_landmarks, enable_segmentation,
+                  smooth_segmentation, min_detection_confidence, min_tracking_confidence)
+        if config not in PoseEstimator._shared_poses:
+            PoseEstimator._shared_poses[config] = (self.mp_pose.Pose(
+                static_image_mode=self.mode,
+                model_complexity=self.model_complexity,
+                smooth_landmarks=self.smooth_landmarks,
+                enable_segmentation=self.enable_segmentation,
+                smooth_segmentation=self.smooth_segmentation,
+                min_detection_confidence=self.min_detection_confidence,
+                min_tracking_confidence=self.min_tracking_confidence
+            ), threading.Lock())
+        self.pose, pose_lock = PoseEstimator._shared_poses[config]
+        self._worker = PoseWorker(self.pose, maxsize=lookahead + 1, lock=pose_lock)
+        PoseEstimator._workers.append(self._worker)
         self.mp_draw = mp.solutions.drawing_utils
+        self.results = _NO_RESULTS
+        self._new_results = False
+        self.lm_xy = np.zeros((33, 2), dtype=np.float32)
+        self.lm_vis = np.zeros(33, dtype=np.float32)
+        self._scale_shape = None
+        self._dsize_shape = None
+        
+        # Ring of RGB inference buffers, one per frame in flight,
+        # reused across frames of the same size
+        self._rgb_bufs = [None] * (lookahead + 1)
+        self._rgb_idx = 0
+        
+        # Inference backoff while no person is in view
+        self._frame_idx = 0
+        self._empty_streak = 0
+        self._skip = 1
+    
+    @classmethod
+    def close_workers(cls):
+        """Stop all pose workers and release the shared MediaPipe graphs.
+        
+        Call once at shutdown; estimators created afterwards start afresh.
+        """
+        for worker in cls._workers:
+            worker.close()
+        for pose, _ in cls._shared_poses.values():
+            pose.close()
+        cls._workers.clear()
+        cls._shared_poses.clear()
     
     def find_pose(self, img, draw=True):
         """Find pose landmarks in the given image.
@@ -57,8 +116,49 @@ class PoseEstimator:
         Returns:
             tuple: (image with landmarks drawn, results from MediaPipe)
         """
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.pose.process(img_rgb)
+        # Pick up whatever the worker has finished since the last frame
+        self._new_results = False
+        results = self._worker.try_get()
+        while results is not None:
+            self.results = results
+            self._new_results = True
+            self._update_backoff()
+            results = self._worker.try_get()
+        
+        # While nobody is in view only every `_skip`-th frame is inferred;
+        # skipped frames keep the last (empty) results
+        self._frame_idx += 1
+        if (self._frame_idx % self._skip == 0 and
+                self._worker.pending < max(self.lookahead, 1)):
+            # The buffer's previous frame came back from the worker long ago
+            rgb = self._rgb_bufs[self._rgb_idx]
+            if rgb is not None:
+                rgb.flags.writeable = True
+            
+            if self._dsize_shape != img.shape:
+                self._dsize_shape = img.shape
+                self._dsize = self._inference_dsize(img.shape)
+            
+            if self._dsize is not None:
+                # Landmarks are normalized, so inference can run on a smaller copy,
+                # resized straight into the buffer and channel-swapped in place
+                rgb = cv2.resize(img, self._dsize, dst=rgb,
+                                 interpolation=cv2.INTER_AREA)
+                cv2.cvtColor(rgb, cv2.COLOR_BGR2RGB, dst=rgb)
+            else:
+                rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=rgb)
+            self._rgb_bufs[self._rgb_idx] = rgb
+            self._rgb_idx = (self._rgb_idx + 1) % len(self._rgb_bufs)
+            
+            # Marking the frame read-only lets MediaPipe use it by reference
+            rgb.flags.writeable = False
+            
+            # Run inference on the worker, waiting for it only without lookahead
+            self._worker.submit(rgb)
+            if self.lookahead == 0:
+                self.results = self._worker.get()
+                self._new_results = True
+                self._update_backoff()
         
         if draw and self.results.pose_landmarks:
             self.mp_draw.draw_landmarks(
@@ -67,28 +167,72 @@ class PoseEstimator:
                 
         return img
     
+    def _inference_dsize(self, shape):
+        """Work out the size frames of the given shape are resized to for inference.
+        
+        Args:
+            shape (tuple): Frame shape, (height, width, channels).
+            
+        Returns:
+            tuple: (width, height) with the long side at inference_size and the
+                frame's aspect ratio, or None if the frame is used as is.
+        """
+        h, w = shape[:2]
+        if self.inference_size is None or max(h, w) <= self.inference_size:
+            return None
+        
+        scale = self.inference_size / max(h, w)
+        return max(1, round(w * scale)), max(1, round(h * scale))
+    
+    def _update_backoff(self):
+        """Widen the inference interval after consecutive empty results.
+        
+        The interval doubles every 5 empty results, up to every 8th frame,
+        and resets as soon as a pose is found.
+        """
+        if self.results.pose_landmarks:
+            self._empty_streak = 0
+            self._skip = 1
+        else:
+            self._empty_streak += 1
+            self._skip = min(8, 1 << (self._empty_streak // 5))
+    
     def find_position(self, img, draw=True):
         """Extract the positions of all pose landmarks.
         
+        The positions are stored in self.lm_xy, a (33, 2) float32 array of
+        sub-pixel coordinates indexed by landmark id, and their visibility
+        scores in self.lm_vis.
+        
         Args:
             img: Input image.
             draw (bool): Whether to draw the landmark positions on the image.
             
         Returns:
-            list: List of landmark positions with their visibility scores.
+            numpy.ndarray: self.lm_xy, or an empty (0, 2) view if no pose was found.
         """
-        self.lm_list = []
+        if not self.results.pose_landmarks:
+            return self.lm_xy[:0]
         
-        if self.results.pose_landmarks:
-            for id, lm in enumerate(self.results.pose_landmarks.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                self.lm_list.append([id, cx, cy, lm.visibility])
+        if self._scale_shape != img.shape:
+            h, w, c = self._scale_shape = img.shape
+            self._scale = np.array([w, h], dtype=np.float32)
+        
+        # Read all landmarks in one pass, then scale to pixels at once
+        pts = np.fromiter(
+            (v for lm in self.results.pose_landmarks.landmark
+             for v in (lm.x, lm.y, lm.visibility)),
+            dtype=np.float32, count=33 * 3).reshape(33, 3)
+        np.multiply(pts[:, :2], self._scale, out=self.lm_xy)
+        self.lm_vis = pts[:, 2]
+        
+        if draw:
+            # Zero-length segments with thickness 10 draw all dots in one call;
+            # only drawing needs whole pixels
+            dots = np.repeat(self.lm_xy.astype(np.int32)[:, None], 2, axis=1)
+            cv2.polylines(img, list(dots), False, (255, 0, 0), 10)
                 
-                if draw:
-                    cv2.circle(img, (cx, cy), 5, (255, 0, 0), cv2.FILLED)
-                    
-        return self.lm_list
+        return self.lm_xy
     
     def calculate_angle(self, a, b, c):
         """Calculate the angle between three points.
@@ -99,15 +243,5 @@ class PoseEstimator:
         Returns:
             float: Angle in degrees.
         """
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-        
-        radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - \
-                 np.arctan2(a[1]-b[1], a[0]-b[0])
-        angle = np.abs(radians*180.0/np.pi)
-        
-        if angle > 180.0:
-            angle = 360 - angle
-            
-        return angle
+        return joint_angle(float(a[0]), float(a[1]), float(b[0]), float(b[1]),
+                           float(c[0]), float(c[1]))
@@ -0,0 +1,91 @@
+"""
+Pose Worker Module
+
+This module provides the PoseWorker class which runs MediaPipe Pose inference
+on a background thread so the caller can keep working while a frame is processed.
+"""
+
+import queue
+import threading
+
+class PoseWorker:
+    """A background thread that runs a MediaPipe Pose solution for one caller."""
+
+    def __init__(self, pose, maxsize=2, lock=None):
+        """Start the worker thread.
+
+        Args:
+            pose: MediaPipe Pose solution, only called from worker threads.
+            maxsize (int): Maximum number of frames (and results) queued at once.
+            lock: Lock held around each inference, shared by all workers using
+                the same pose; a private lock if None.
+        """
+        self.pose = pose
+        self.pending = 0
+        self._lock = lock if lock is not None else threading.Lock()
+        self._in_q = queue.Queue(maxsize=maxsize)
+        self._out_q = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Process submitted frames until the None sentinel arrives."""
+        while True:
+            img_rgb = self._in_q.get()
+            if img_rgb is None:
+                break
+
+            try:
+                with self._lock:
+                    results = self.pose.process(img_rgb)
+                self._out_q.put(results)
+            except Exception as e:
+                self._out_q.put(e)
+
+    def submit(self, img_rgb):
+        """Queue an RGB frame for inference.
+
+        The frame must not be modified until its result has been retrieved.
+
+        Args:
+            img_rgb: Input image in RGB format.
+        """
+        self._in_q.put(img_rgb)
+        self.pending += 1
+
+    def get(self):
+        """Wait for the oldest pending result.
+
+        Returns:
+            Results from MediaPipe for the oldest submitted frame.
+        """
+        results = self._out_q.get()
+        self.pending -= 1
+
+        if isinstance(results, Exception):
+            raise results
+        return results
+
+    def try_get(self):
+        """Return the oldest pending result if it is ready, without waiting.
+
+        Returns:
+            Results from MediaPipe, or None if no result is ready yet.
+        """
+        try:
+            results = self._out_q.get_nowait()
+        except queue.Empty:
+            return None
+        self.pending -= 1
+
+        if isinstance(results, Exception):
+            raise results
+        return results
+
+    def close(self):
+        """Stop the worker thread once queued frames are processed.
+
+        Waits for the thread to exit; the pose itself is left open.
+        """
+        self._in_q.put(None)
+        self._thread.join()
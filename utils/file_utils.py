@@ -8,6 +8,12 @@ import os
 import csv
 from datetime import datetime
 
+# Append-only log of every saved workout, one row per session
+HISTORY_FILE = 'history.csv'
+
+# Parsed history rows keyed by file path, with the (mtime, size) they were read at
+_history_cache = {}
+
 def ensure_dir(directory):
     """Ensure that a directory exists, create it if it doesn't.
     
@@ -35,6 +41,8 @@ def save_workout_data(data, filename=None, directory='workout_data'):
     if filename is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"workout_{timestamp}.csv"
+    elif filename == HISTORY_FILE:
+        raise ValueError(f"{HISTORY_FILE} is reserved for the workout history")
     
     filepath = os.path.join(directory, filename)
     
@@ -47,8 +55,44 @@ def save_workout_data(data, filename=None, directory='workout_data'):
         writer.writeheader()
         writer.writerow(data)
     
+    _append_history(data, directory)
+    
     return filepath
 
+def _append_history(data, directory):
+    """Append a workout to the history file, creating it if needed.
+    
+    Args:
+        data (dict): Dictionary containing workout data
+        directory (str): Directory holding the history file
+    """
+    filepath = os.path.join(directory, HISTORY_FILE)
+    fieldnames = list(data.keys())
+    
+    is_new = not os.path.exists(filepath) or os.path.getsize(filepath) == 0
+    if not is_new:
+        with open(filepath, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            header = reader.fieldnames or []
+            new_fields = [k for k in fieldnames if k not in header]
+            rows = list(reader) if new_fields else None
+        
+        # Rewrite the file under a wider header when a workout brings new fields
+        if new_fields:
+            with open(filepath, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=header + new_fields)
+                writer.writeheader()
+                writer.writerows(rows)
+                writer.writerow(data)
+            return
+        fieldnames = header
+    
+    with open(filepath, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        if is_new:
+            writer.writeheader()
+        writer.writerow(data)
+
 def load_workout_data(filepath):
     """Load workout data from a CSV file.
     
@@ -67,6 +111,31 @@ def load_workout_data(filepath):
     
     return data
 
+def get_workout_history(directory='workout_data'):
+    """Get every workout recorded in the history file, oldest first.
+    
+    The file is only parsed again when it has changed since the last call.
+    
+    Args:
+        directory (str, optional): Directory to search in. Defaults to 'workout_data'.
+        
+    Returns:
+        list: Dictionaries containing workout data, empty if there is no history
+    """
+    filepath = os.path.join(directory, HISTORY_FILE)
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return []
+    
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _history_cache.get(filepath)
+    if cached is None or cached[0] != stamp:
+        with open(filepath, 'r', newline='') as f:
+            cached = _history_cache[filepath] = (stamp, list(csv.DictReader(f)))
+    
+    return [dict(row) for row in cached[1]]
+
 def get_latest_workout_data(directory='workout_data'):
     """Get the most recent workout data file.
     
@@ -79,15 +148,15 @@ def get_latest_workout_data(directory='workout_data'):
     if not os.path.exists(directory):
         return None
         
-    # Get all CSV files in the directory
-    files = [f for f in os.listdir(directory) if f.endswith('.csv')]
+    # Get all CSV files in the directory; scandir entries carry their
+    # modification time, so no separate stat per file is needed
+    with os.scandir(directory) as entries:
+        files = [e for e in entries
+                 if e.name.endswith('.csv') and e.name != HISTORY_FILE and e.is_file()]
     
     if not files:
         return None
     
-    # Sort by modification time (newest first)
-    files.sort(key=lambda x: os.path.getmtime(os.path.join(directory, x)), reverse=True)
-    
     # Load the most recent file
-    latest_file = os.path.join(directory, files[0])
-    return load_workout_data(latest_file)
+    latest_file = max(files, key=lambda e: e.stat().st_mtime)
+    return load_workout_data(latest_file.path)
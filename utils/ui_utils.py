@@ -5,15 +5,140 @@ This module contains utility functions for drawing UI elements on frames.
 """
 
 import cv2
+import numpy as np
 import time
+from collections import namedtuple
+
+# Pre-rendered static UI sprites and the frame coordinates of the dynamic elements.
+# Each sprite is a (region, pixels, mask) tuple; region is a pair of slices.
+# reps_tiles caches the rendered rep count tiles by count.
+_Chrome = namedtuple('_Chrome', [
+    'sprites', 'bar_tl', 'bar_br', 'pct_pos', 'reps_region', 'reps_tiles', 'fps_pos'
+])
+
+# _Chrome instances keyed by (height, width, exercise name)
+_chrome_cache = {}
+
+# Feedback box corners and text origin keyed by (frame width, feedback text)
+_feedback_cache = {}
+
+# Smoothed FPS, frames drawn and the FPS text currently shown
+_fps = {'ema': 0.0, 'frames': 0, 'text': '0'}
+
+def _label_advance(label, font, scale, thickness):
+    """Horizontal offset at which text following the label starts."""
+    # getTextSize pads the width by the thickness, so measure the difference
+    return (cv2.getTextSize(label + '0', font, scale, thickness)[0][0] -
+            cv2.getTextSize('0', font, scale, thickness)[0][0])
+
+def _feedback_layout(w, text):
+    """
+    Compute where the feedback box and its text go.
+    
+    Args:
+        w: Frame width
+        text: Feedback text
+        
+    Returns:
+        tuple: (box top-left, box bottom-right, text origin)
+    """
+    text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
+    text_x = (w - text_size[0]) // 2
+    return (text_x - 10, 20), (text_x + text_size[0] + 10, 60), (text_x, 50)
+
+def _build_chrome(h, w, name):
+    """
+    Render the UI elements that never change between frames.
+    
+    Args:
+        h: Frame height
+        w: Frame width
+        name: Exercise name shown in the instructions
+    
+    Returns:
+        _Chrome: Sprites of the static elements and element coordinates
+    """
+    chrome = np.zeros((h, w, 3), np.uint8)
+    mask = np.zeros((h, w), np.uint8)
+    
+    def rectangle(pt1, pt2, color, thickness):
+        cv2.rectangle(chrome, pt1, pt2, color, thickness)
+        cv2.rectangle(mask, pt1, pt2, 255, thickness)
+    
+    def put_text(text, org, font, scale, color, thickness):
+        cv2.putText(chrome, text, org, font, scale, color, thickness)
+        cv2.putText(mask, text, org, font, scale, 255, thickness)
+    
+    # Progress bar border and outline; the fill is drawn inside the outline
+    bar_tl, bar_br = (w-100, 100), (w-25, h-100)
+    rectangle(bar_tl, bar_br, (200, 200, 200), 3)
+    rectangle(bar_tl, bar_br, (255, 255, 255), 1)
+    
+    # Rep counter background and label; the count goes in the black area
+    # right of the label, inside the border
+    rectangle((20, 20), (300, 120), (0, 0, 0), -1)
+    rectangle((20, 20), (300, 120), (0, 255, 0), 2)
+    put_text('REPS: ', (40, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+    reps_label_w = _label_advance('REPS: ', cv2.FONT_HERSHEY_SIMPLEX, 1.5, 3)
+    reps_region = (slice(22, 119), slice(40 + reps_label_w, 299))
+    
+    # FPS label
+    put_text('FPS: ', (w-150, 30), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
+    fps_label_w = _label_advance('FPS: ', cv2.FONT_HERSHEY_PLAIN, 2, 2)
+    
+    # Instructions
+    instructions = [
+        "INSTRUCTIONS:",
+        "1. Stand 6-8 feet from camera",
+        "2. Keep feet shoulder-width apart",
+        "3. Keep back straight",
+        f"4. Perform {name} with proper form",
+        "5. Press 'q' to quit"
+    ]
+    
+    for i, line in enumerate(instructions):
+        y_pos = h - 150 + (i * 25)
+        put_text(line, (20, y_pos), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    
+    # Cut the chrome into sprites around each group of drawn pixels, so only
+    # those small regions are touched per frame
+    grown = cv2.dilate(mask, np.ones((15, 15), np.uint8))
+    stats = cv2.connectedComponentsWithStats(grown)[2]
+    sprites = []
+    for x, y, sprite_w, sprite_h, _ in stats[1:]:
+        region = (slice(y, y + sprite_h), slice(x, x + sprite_w))
+        sprites.append((region, chrome[region].copy(), mask[region].copy()))
+    
+    return _Chrome(sprites, bar_tl, bar_br, (w-150, 80),
+                   reps_region, {}, (w-150 + fps_label_w, 30))
+
+def _reps_tile(region, count):
+    """
+    Render the rep count on its black box background.
+    
+    Args:
+        region: (rows, cols) slices of the frame the tile covers
+        count (int): Rep count
+    
+    Returns:
+        numpy.ndarray: Tile to copy over the region
+    """
+    rows, cols = region
+    tile = np.zeros((rows.stop - rows.start, cols.stop - cols.start, 3), np.uint8)
+    cv2.putText(tile, f'{count}', (0, 80 - rows.start),
+               cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+    return tile
 
 def draw_ui(img, detector, per, bar, color, form_ok, form_feedback, p_time):
     """
     Draw the user interface elements on the frame.
     
+    Static elements are rendered once per resolution into small sprites that
+    are copied onto the frame; only the values that change are drawn per frame.
+    
     Args:
         img: The image frame to draw on
-        detector: The exercise counter instance
+        detector: The exercise counter, or any object with its name and count
         per: Exercise completion percentage
         bar: Progress bar height
         color: Color for the progress bar
@@ -26,62 +151,65 @@ def draw_ui(img, detector, per, bar, color, form_ok, form_feedback, p_time):
     """
     h, w, _ = img.shape
     
-    # Draw semi-transparent overlay for better text visibility
-    overlay = img.copy()
-    cv2.rectangle(overlay, (0, 0), (w, h), (0, 0, 0), -1)
+    key = (h, w, detector.name)
+    chrome = _chrome_cache.get(key)
+    if chrome is None:
+        chrome = _chrome_cache[key] = _build_chrome(h, w, detector.name)
+    
+    # Darken the frame for better text visibility. Blending with a black
+    # overlay is just a scale, done in place in a single pass
     alpha = 0.4  # Transparency factor
-    cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0, img)
+    cv2.convertScaleAbs(img, img, 1 - alpha)
     
-    # Draw progress bar with border
-    cv2.rectangle(img, (w-100, 100), (w-25, h-100), (200, 200, 200), 3)
-    cv2.rectangle(img, (w-100, int(bar)), (w-25, h-100), color, cv2.FILLED)
-    cv2.rectangle(img, (w-100, 100), (w-25, h-100), (255, 255, 255), 1)
+    # Copy the static elements onto the frame
+    for region, sprite, sprite_mask in chrome.sprites:
+        cv2.copyTo(sprite, sprite_mask, img[region])
+    
+    # Fill the progress bar inside its outline, plus the part of a full-height
+    # bar that hangs below the bottom on short frames
+    (x0, top), (x1, bottom) = chrome.bar_tl, chrome.bar_br
+    bar_y = int(bar)
+    if bar_y < bottom:
+        cv2.rectangle(img, (x0 + 1, max(bar_y, top + 1)), (x1 - 1, bottom - 1),
+                      color, cv2.FILLED)
+    elif bar_y > bottom:
+        cv2.rectangle(img, (x0, bottom + 1), (x1, bar_y), color, cv2.FILLED)
     
     # Draw percentage text
-    cv2.putText(img, f'{int(per)}%', (w-150, 80),
+    cv2.putText(img, f'{int(per)}%', chrome.pct_pos,
                cv2.FONT_HERSHEY_PLAIN, 2, (255, 255, 255), 2)
     
-    # Draw rep counter with background
-    cv2.rectangle(img, (20, 20), (300, 120), (0, 0, 0), -1)
-    cv2.rectangle(img, (20, 20), (300, 120), (0, 255, 0), 2)
-    cv2.putText(img, f'REPS: {int(detector.count)}', (40, 80), 
-               cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+    # Draw rep count from a tile rendered once per count
+    count = int(detector.count)
+    tile = chrome.reps_tiles.get(count)
+    if tile is None:
+        if len(chrome.reps_tiles) >= 1024:
+            chrome.reps_tiles.clear()
+        tile = chrome.reps_tiles[count] = _reps_tile(chrome.reps_region, count)
+    img[chrome.reps_region] = tile
     
     # Draw form feedback with background
     if form_feedback:
-        text_size = cv2.getTextSize(form_feedback, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
-        text_x = (w - text_size[0]) // 2
-        cv2.rectangle(img, 
-                     (text_x - 10, 20), 
-                     (text_x + text_size[0] + 10, 60), 
-                     (0, 0, 0), -1)
-        cv2.rectangle(img, 
-                     (text_x - 10, 20), 
-                     (text_x + text_size[0] + 10, 60), 
+        layout = _feedback_cache.get((w, form_feedback))
+        if layout is None:
+            layout = _feedback_cache[(w, form_feedback)] = _feedback_layout(w, form_feedback)
+        box_tl, box_br, text_org = layout
+        cv2.rectangle(img, box_tl, box_br, (0, 0, 0), -1)
+        cv2.rectangle(img, box_tl, box_br,
                      (0, 255, 0) if form_ok else (0, 0, 255), 2)
-        cv2.putText(img, form_feedback, (text_x, 50),
+        cv2.putText(img, form_feedback, text_org,
                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, 
                    (255, 255, 255), 2)
     
-    # Draw FPS
+    # Draw FPS, smoothed and only updated every 10 frames so it stays readable
     c_time = time.time()
-    fps = 1 / (c_time - p_time)
-    cv2.putText(img, f'FPS: {int(fps)}', (w-150, 30),
+    fps = 1 / max(c_time - p_time, 1e-6)
+    # The first frame has no real previous time, so seed from the second
+    _fps['ema'] = fps if _fps['frames'] < 2 else 0.9 * _fps['ema'] + 0.1 * fps
+    if _fps['frames'] % 10 == 0:
+        _fps['text'] = f"{int(_fps['ema'])}"
+    _fps['frames'] += 1
+    cv2.putText(img, _fps['text'], chrome.fps_pos,
                cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
     
-    # Draw instructions
-    instructions = [
-        "INSTRUCTIONS:",
-        "1. Stand 6-8 feet from camera",
-        "2. Keep feet shoulder-width apart",
-        "3. Keep back straight",
-        f"4. Perform {detector.name} with proper form",
-        "5. Press 'q' to quit"
-    ]
-    
-    for i, line in enumerate(instructions):
-        y_pos = h - 150 + (i * 25)
-        cv2.putText(img, line, (20, y_pos),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-    
     return img, c_time